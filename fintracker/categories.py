@@ -0,0 +1,27 @@
+"""
+Модуль начальных категорий расходов.
+
+Содержит неизменяемый набор категорий, которыми заполняется новая база
+данных, и словарь для поиска среди них по названию без обращения к БД.
+"""
+
+from typing import Dict, Tuple
+from .models import Category
+
+__all__ = ['INITIAL_CATEGORIES', 'INITIAL_CATEGORIES_BY_LNAME']
+
+
+# Категории, создаваемые при инициализации базы данных
+INITIAL_CATEGORIES: Tuple[Category, ...] = (
+    Category(1, 'Еда'),
+    Category(2, 'Транспорт'),
+    Category(3, 'Развлечения'),
+    Category(4, 'Коммунальные'),
+    Category(5, 'Одежда'),
+    Category(6, 'Здоровье'),
+)
+
+# Начальные категории по названию в нижнем регистре
+INITIAL_CATEGORIES_BY_LNAME: Dict[str, Category] = {
+    category.name.lower(): category for category in INITIAL_CATEGORIES
+}
@@ -5,10 +5,17 @@
 и выполнения соответствующих действий.
 """
 
-import argparse
+import sys
+from typing import Optional
+from .categories import INITIAL_CATEGORIES_BY_LNAME
 from .storage import Storage
 from .report import ReportGenerator
 
+__all__ = ['CommandHandler']
+
+# Шаблон строки расхода в выводе команды list (связанный метод str.format)
+_LIST_LINE = "{} | {:15} | {:8.2f} ₽ | {}\n".format
+
 
 class CommandHandler:
     """Класс для обработки команд командной строки.
@@ -18,9 +25,14 @@ class CommandHandler:
         report_generator (ReportGenerator): Объект генератора отчетов.
     """
 
-    def __init__(self):
-        """Инициализирует обработчик команд."""
-        self.storage = Storage()
+    def __init__(self, storage: Optional[Storage] = None):
+        """Инициализирует обработчик команд.
+
+        Args:
+            storage (Optional[Storage], optional): Хранилище данных.
+                Если не указано, создается хранилище с базой по умолчанию.
+        """
+        self.storage = storage if storage is not None else Storage()
         self.report_generator = ReportGenerator(self.storage)
 
     def handle_add(self, args):
@@ -30,23 +42,21 @@ class CommandHandler:
             args: Аргументы командной строки для команды add.
         """
         try:
-            category_id = None
-            categories = self.storage.get_categories()
-
-            for category in categories:
-                if category.name.lower() == args.category.lower():
-                    category_id = category.id
-                    break
+            # Начальные категории находятся без обращения к БД,
+            # остальные ищутся в кэше категорий хранилища
+            category = INITIAL_CATEGORIES_BY_LNAME.get(args.category.lower())
+            if category is None:
+                category = self.storage.get_category_by_name(args.category)
 
-            if category_id is None:
+            if category is None:
                 print(f"Категория '{args.category}' не найдена!")
                 print("Доступные категории:")
-                for cat in categories:
+                for cat in self.storage.categories_by_id().values():
                     print(f"  - {cat.name}")
                 return
 
             success = self.storage.add_expense(
-                category_id=category_id,
+                category_id=category.id,
                 amount=args.amount,
                 description=args.description
             )
@@ -66,22 +76,26 @@ class CommandHandler:
             args: Аргументы командной строки для команды list.
         """
         try:
-            expenses = self.storage.get_expenses(args.period)
-            categories = {cat.id: cat for cat in self.storage.get_categories()}
-
-            if not expenses:
-                print(f"Расходы за указанный период ({args.period}) не найдены")
-                return
-
-            print(f"\n=== РАСХОДЫ ({args.period.upper()}) ===")
+            # Строки выводятся по мере чтения из БД через буферизованный stdout,
+            # поэтому весь список расходов не хранится в памяти.
+            # Поля строки распаковываются в локальные переменные сразу в заголовке
+            # цикла, без обращения к атрибутам на каждой итерации.
+            write = sys.stdout.write
+            line = _LIST_LINE
             total = 0
+            count = 0
 
-            for expense in expenses:
-                category = categories.get(expense.category_id, None)
-                category_name = category.name if category else "Неизвестно"
+            rows = self.storage.iter_expenses_with_category_name(args.period)
+            for _, _, amount, description, expense_date, category_name in rows:
+                if not count:
+                    write(f"\n=== РАСХОДЫ ({args.period.upper()}) ===\n")
+                write(line(expense_date, category_name, amount, description))
+                total += amount
+                count += 1
 
-                print(f"{expense.date} | {category_name:15} | {expense.amount:8.2f} ₽ | {expense.description}")
-                total += expense.amount
+            if not count:
+                print(f"Расходы за указанный период ({args.period}) не найдены")
+                return
 
             print(f"\nИтого расходы: {total:.2f} ₽")
 
@@ -115,10 +129,10 @@ class CommandHandler:
             args: Аргументы командной строки для команды categories.
         """
         try:
-            categories = self.storage.get_categories()
+            categories = self.storage.categories_by_id()
 
             print("\n=== КАТЕГОРИИ РАСХОДОВ ===")
-            for cat in categories:
+            for cat in categories.values():
                 print(f"  - {cat.name}")
 
         except Exception as e:
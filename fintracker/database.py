@@ -6,9 +6,106 @@
 
 import sqlite3
 import os
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import date
-from .models import Category, Expense
+from .categories import INITIAL_CATEGORIES
+from .models import Category, Expense, ExpenseWithCategory
+
+
+# Версия схемы БД, записываемая в PRAGMA user_version после инициализации
+SCHEMA_VERSION = 1
+
+# SQL-условия отбора расходов (псевдоним таблицы "e") для каждого периода.
+# Все условия сравнивают сам столбец date с границами диапазона, поэтому
+# SQLite отбирает строки по индексу, не вычисляя функцию для каждой строки
+_PERIOD_CONDITIONS = {
+    "day": "e.date = date('now', 'localtime')",
+    "week": "e.date BETWEEN date('now', 'localtime', '-7 day') AND date('now', 'localtime')",
+    "month": (
+        "e.date >= date('now', 'localtime', 'start of month') "
+        "AND e.date < date('now', 'localtime', 'start of month', '+1 month')"
+    ),
+    "year": (
+        "e.date >= date('now', 'localtime', 'start of year') "
+        "AND e.date < date('now', 'localtime', 'start of year', '+1 year')"
+    ),
+}
+
+
+def _period_queries(template: str, keyword: str) -> Dict[str, str]:
+    """Строит по шаблону готовые тексты запроса для каждого периода.
+
+    Одинаковый текст запроса позволяет sqlite3 повторно использовать
+    подготовленные выражения из своего кэша.
+
+    Args:
+        template (str): Шаблон запроса с полем {condition}.
+        keyword (str): Ключевое слово перед условием ("WHERE" или "AND").
+
+    Returns:
+        Dict[str, str]: Словарь {период: текст запроса}, включая "all".
+    """
+    queries = {"all": template.format(condition="")}
+    for period, condition in _PERIOD_CONDITIONS.items():
+        queries[period] = template.format(condition=f"{keyword} {condition}")
+    return queries
+
+
+# Список расходов за период
+_EXPENSES_SQL = _period_queries('''
+    SELECT e.id, e.category_id, e.amount, e.description, e.date
+    FROM expenses e
+    {condition}
+    ORDER BY e.date DESC, e.id DESC
+''', "WHERE")
+
+# Расходы вместе с названием категории. Категория присоединяется
+# через LEFT JOIN, чтобы расходы с удаленной категорией не терялись
+_EXPENSES_WITH_CATEGORY_SQL = _period_queries('''
+    SELECT e.id, e.category_id, e.amount, e.description, e.date,
+           COALESCE(c.name, 'Неизвестно')
+    FROM expenses e
+    LEFT JOIN categories c ON c.id = e.category_id
+    {condition}
+    ORDER BY e.date DESC, e.id DESC
+''', "WHERE")
+
+# Статистика по категориям вместе с общей суммой за период (оконная
+# функция по результату CTE). Условие периода добавляется в LEFT JOIN,
+# поэтому фильтруются только расходы, а не сами категории
+_STATS_SQL = _period_queries('''
+    WITH per_category AS (
+        SELECT
+            c.id,
+            c.name,
+            COUNT(e.id) as transaction_count,
+            COALESCE(SUM(e.amount), 0) as total_amount
+        FROM categories c
+        LEFT JOIN expenses e ON c.id = e.category_id {condition}
+        GROUP BY c.id, c.name
+        HAVING total_amount > 0
+    )
+    SELECT id, name, transaction_count, total_amount,
+           SUM(total_amount) OVER () as grand_total
+    FROM per_category
+    ORDER BY total_amount DESC
+''', "AND")
+
+
+def _expense_row(cursor: sqlite3.Cursor, row: tuple) -> Expense:
+    """Фабрика строк sqlite3, создающая Expense напрямую из кортежа."""
+    return Expense(*row)
+
+
+def _expense_with_category_row(cursor: sqlite3.Cursor, row: tuple) -> ExpenseWithCategory:
+    """Фабрика строк sqlite3, создающая ExpenseWithCategory из кортежа."""
+    return ExpenseWithCategory._make(row)
+
+
+def _category_row(cursor: sqlite3.Cursor, row: tuple) -> Category:
+    """Фабрика строк sqlite3, создающая Category напрямую из кортежа."""
+    return Category(*row)
 
 
 class Database:
@@ -16,6 +113,7 @@ class Database:
 
     Attributes:
         db_path (str): Путь к файлу базы данных.
+        _conn (sqlite3.Connection): Соединение, общее для всех операций.
     """
 
     def __init__(self, db_path: str = "finance_tracker.db"):
@@ -26,13 +124,29 @@ class Database:
                 По умолчанию "finance_tracker.db".
         """
         self.db_path = db_path
+        self._conn = self.get_connection()
         self._init_database()
 
     def _init_database(self):
-        """Инициализирует базу данных и создает таблицы если они не существуют."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Инициализирует базу данных и создает таблицы если они не существуют.
+
+        Версия схемы хранится в PRAGMA user_version: если база уже
+        инициализирована, создание таблиц и заполнение категорий пропускаются.
+        """
+        with self._connect() as conn:
             cursor = conn.cursor()
 
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= SCHEMA_VERSION:
+                return
+
+            # Режим журнала WAL сохраняется в файле БД, поэтому включается один раз
+            cursor.execute("PRAGMA journal_mode=WAL")
+
+            # Блокируем запись сразу, чтобы параллельный процесс
+            # не инициализировал ту же базу одновременно
+            cursor.execute("BEGIN IMMEDIATE")
+
             # Создаем таблицу категорий
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS categories (
@@ -53,31 +167,72 @@ class Database:
                 )
             ''')
 
+            # Индекс для фильтрации по периоду и сортировки списка расходов
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_expenses_date_id
+                ON expenses (date DESC, id DESC)
+            ''')
+
+            # Индекс для соединения расходов с категориями
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_expenses_category_id ON expenses (category_id)"
+            )
+
             # Добавляем начальные категории если таблица пустая
             cursor.execute("SELECT COUNT(*) FROM categories")
             if cursor.fetchone()[0] == 0:
-                initial_categories = [
-                    (1, 'Еда'),
-                    (2, 'Транспорт'),
-                    (3, 'Развлечения'),
-                    (4, 'Коммунальные'),
-                    (5, 'Одежда'),
-                    (6, 'Здоровье')
-                ]
                 cursor.executemany(
                     "INSERT INTO categories (id, name) VALUES (?, ?)",
-                    initial_categories
+                    [(category.id, category.name) for category in INITIAL_CATEGORIES]
                 )
 
-            conn.commit()
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
     def get_connection(self) -> sqlite3.Connection:
         """Создает и возвращает соединение с базой данных.
 
+        Для соединения включается synchronous=NORMAL (в режиме WAL это
+        безопасно и снижает задержку фиксации) и хранение временных
+        данных в памяти.
+
         Returns:
             sqlite3.Connection: Объект соединения с базой данных.
         """
-        return sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def _connect(self):
+        """Предоставляет общее соединение на время одной операции.
+
+        Транзакция фиксируется при успешном завершении блока
+        и откатывается при ошибке. Соединение остается открытым.
+
+        Yields:
+            sqlite3.Connection: Объект соединения с базой данных.
+        """
+        with self._conn:
+            yield self._conn
+
+    def close(self):
+        """Закрывает соединение с базой данных."""
+        self._conn.close()
+
+    def get_data_version(self) -> Tuple[int, int]:
+        """Возвращает метку текущего состояния данных в БД.
+
+        Метка меняется после любой фиксированной записи: PRAGMA data_version
+        отслеживает изменения из других соединений, а total_changes —
+        изменения через собственное соединение.
+
+        Returns:
+            Tuple[int, int]: Пара (data_version, total_changes).
+        """
+        with self._connect() as conn:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            return data_version, conn.total_changes
 
     def add_expense(self, category_id: int, amount: float, description: str,
                     expense_date: Optional[str] = None) -> bool:
@@ -93,21 +248,61 @@ class Database:
         Returns:
             bool: True если запись успешно добавлена, False в случае ошибки.
         """
+        return self.add_expenses([(category_id, amount, description, expense_date)]) == 1
+
+    def add_expenses(self, rows: Iterable[Tuple[int, float, str, Optional[str]]]) -> int:
+        """Добавляет несколько записей о расходах одной транзакцией.
+
+        Все записи вставляются через executemany и фиксируются один раз,
+        поэтому массовый импорт не требует синхронизации диска на каждую строку.
+        При ошибке транзакция откатывается целиком.
+
+        Args:
+            rows (Iterable[Tuple[int, float, str, Optional[str]]]): Записи
+                в виде кортежей (category_id, amount, description, expense_date).
+                Если дата равна None, используется текущая дата.
+
+        Returns:
+            int: Количество добавленных записей, 0 в случае ошибки.
+        """
         try:
-            if expense_date is None:
-                expense_date = date.today().isoformat()
+            today = date.today().isoformat()
 
-            with self.get_connection() as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
+                cursor.executemany('''
                     INSERT INTO expenses (category_id, amount, description, date)
                     VALUES (?, ?, ?, ?)
-                ''', (category_id, amount, description, expense_date))
-                conn.commit()
-                return True
+                ''', (
+                    (category_id, amount, description, expense_date or today)
+                    for category_id, amount, description, expense_date in rows
+                ))
+                return cursor.rowcount
         except Exception as e:
-            print(f"Ошибка при добавлении записи в БД: {e}")
-            return False
+            print(f"Ошибка при добавлении записей в БД: {e}")
+            return 0
+
+    def iter_expenses(self, period: str = "all") -> Iterator[Expense]:
+        """Последовательно выдает расходы за указанный период.
+
+        Строки читаются из курсора по одной, поэтому весь результат
+        запроса не загружается в память целиком.
+
+        Args:
+            period (str, optional): Период для фильтрации.
+                Допустимые значения: "day", "week", "month", "year", "all".
+                По умолчанию "all".
+
+        Yields:
+            Expense: Объекты Expense за указанный период.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = _expense_row
+                yield from cursor.execute(_EXPENSES_SQL.get(period, _EXPENSES_SQL["all"]))
+        except Exception as e:
+            print(f"Ошибка при получении записей из БД: {e}")
 
     def get_expenses(self, period: str = "all") -> List[Expense]:
         """Возвращает список расходов за указанный период.
@@ -120,53 +315,30 @@ class Database:
         Returns:
             List[Expense]: Список объектов Expense за указанный период.
         """
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
+        return list(self.iter_expenses(period))
 
-                # Базовый запрос
-                query = '''
-                    SELECT e.id, e.category_id, e.amount, e.description, e.date
-                    FROM expenses e
-                '''
-                params = []
-
-                # Добавляем фильтрацию по периоду
-                if period != "all":
-                    today = date.today()
-
-                    if period == "day":
-                        query += " WHERE e.date = ?"
-                        params.append(today.isoformat())
-                    elif period == "week":
-                        week_ago = (today - date.today().replace(day=today.day - 7)).isoformat()
-                        query += " WHERE e.date BETWEEN ? AND ?"
-                        params.extend([week_ago, today.isoformat()])
-                    elif period == "month":
-                        query += " WHERE strftime('%Y-%m', e.date) = strftime('%Y-%m', 'now')"
-                    elif period == "year":
-                        query += " WHERE strftime('%Y', e.date) = strftime('%Y', 'now')"
-
-                query += " ORDER BY e.date DESC, e.id DESC"
-
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
+    def iter_expenses_with_category_name(self, period: str = "all") -> Iterator[ExpenseWithCategory]:
+        """Последовательно выдает расходы за период вместе с названиями категорий.
+
+        Расходы и категории выбираются одним запросом с соединением таблиц,
+        строки читаются из курсора по одной.
+
+        Args:
+            period (str, optional): Период для фильтрации.
+                Допустимые значения: "day", "week", "month", "year", "all".
+                По умолчанию "all".
 
-                expenses = []
-                for row in rows:
-                    expense = Expense(
-                        id=row[0],
-                        category_id=row[1],
-                        amount=row[2],
-                        description=row[3],
-                        date=row[4]
-                    )
-                    expenses.append(expense)
-
-                return expenses
+        Yields:
+            ExpenseWithCategory: Расходы с названиями категорий.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = _expense_with_category_row
+                sql = _EXPENSES_WITH_CATEGORY_SQL.get(period, _EXPENSES_WITH_CATEGORY_SQL["all"])
+                yield from cursor.execute(sql)
         except Exception as e:
             print(f"Ошибка при получении записей из БД: {e}")
-            return []
 
     def get_categories(self) -> List[Category]:
         """Возвращает список всех категорий из базы данных.
@@ -175,17 +347,10 @@ class Database:
             List[Category]: Список объектов Category.
         """
         try:
-            with self.get_connection() as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT id, name FROM categories ORDER BY id")
-                rows = cursor.fetchall()
-
-                categories = []
-                for row in rows:
-                    category = Category(id=row[0], name=row[1])
-                    categories.append(category)
-
-                return categories
+                cursor.row_factory = _category_row
+                return cursor.execute("SELECT id, name FROM categories ORDER BY id").fetchall()
         except Exception as e:
             print(f"Ошибка при получении категорий из БД: {e}")
             return []
@@ -200,7 +365,7 @@ class Database:
             bool: True если запись удалена, False если запись не найдена.
         """
         try:
-            with self.get_connection() as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
                 conn.commit()
@@ -218,50 +383,39 @@ class Database:
         Returns:
             List[dict]: Список словарей со статистикой по категориям.
         """
+        return self.get_category_stats_with_total(period)[0]
+
+    def get_category_stats_with_total(self, period: str = "all") -> Tuple[List[dict], float]:
+        """Возвращает статистику по категориям и общую сумму за период.
+
+        Общая сумма считается тем же запросом, что и статистика,
+        поэтому данные берутся из БД за одно обращение.
+
+        Args:
+            period (str, optional): Период для статистики.
+
+        Returns:
+            Tuple[List[dict], float]: Список словарей со статистикой
+                по категориям и общая сумма расходов.
+        """
         try:
-            with self.get_connection() as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-
-                query = '''
-                    SELECT 
-                        c.id,
-                        c.name,
-                        COUNT(e.id) as transaction_count,
-                        COALESCE(SUM(e.amount), 0) as total_amount
-                    FROM categories c
-                    LEFT JOIN expenses e ON c.id = e.category_id
-                '''
-                params = []
-
-                # Добавляем фильтрацию по периоду
-                if period != "all":
-                    if period == "month":
-                        query += " AND strftime('%Y-%m', e.date) = strftime('%Y-%m', 'now')"
-                    elif period == "year":
-                        query += " AND strftime('%Y', e.date) = strftime('%Y', 'now')"
-                    elif period == "week":
-                        # Для недели нужна более сложная логика
-                        pass
-
-                query += '''
-                    GROUP BY c.id, c.name
-                    HAVING total_amount > 0
-                    ORDER BY total_amount DESC
-                '''
-
-                cursor.execute(query, params)
+                cursor.execute(_STATS_SQL.get(period, _STATS_SQL["all"]))
                 rows = cursor.fetchall()
 
-                stats = []
-                for row in rows:
-                    stats.append({
-                        'category_id': row[0],
-                        'category_name': row[1],
-                        'transaction_count': row[2],
-                        'total_amount': row[3]
-                    })
+                stats = [
+                    {
+                        'category_id': category_id,
+                        'category_name': name,
+                        'transaction_count': transaction_count,
+                        'total_amount': total_amount
+                    }
+                    for category_id, name, transaction_count, total_amount, _ in rows
+                ]
 
-                return stats
+                grand_total = rows[0][4] if rows else 0
+                return stats, grand_total
         except Exception as e:
             print(f"Ошибка при получении статистики из БД: {e}")
-            return []
\ No newline at end of file
+            return [], 0
@@ -4,28 +4,33 @@
 Содержит классы для представления категорий и записей о расходах.
 """
 
-import json
-from datetime import date
+from collections import namedtuple
+from dataclasses import dataclass
 from typing import Dict
 
+__all__ = ['Category', 'Expense', 'ExpenseWithCategory']
 
+
+# Строка расхода с уже подставленным названием категории
+ExpenseWithCategory = namedtuple(
+    'ExpenseWithCategory',
+    ['id', 'category_id', 'amount', 'description', 'date', 'category_name']
+)
+
+
+@dataclass(slots=True, frozen=True)
 class Category:
     """Класс для представления категории расходов.
 
+    Неизменяемый объект со слотами: экземпляры не хранят __dict__.
+
     Attributes:
         id (int): Уникальный идентификатор категории.
         name (str): Название категории.
     """
 
-    def __init__(self, id: int, name: str):
-        """Инициализирует объект категории.
-
-        Args:
-            id (int): Уникальный идентификатор категории.
-            name (str): Название категории.
-        """
-        self.id = id
-        self.name = name
+    id: int
+    name: str
 
     def to_dict(self) -> Dict:
         """Преобразует объект категории в словарь.
@@ -54,9 +59,12 @@ class Category:
         )
 
 
+@dataclass(slots=True, frozen=True)
 class Expense:
     """Класс для представления записи о расходе.
 
+    Неизменяемый объект со слотами: экземпляры не хранят __dict__.
+
     Attributes:
         id (int): Уникальный идентификатор записи.
         category_id (int): ID категории расхода.
@@ -65,21 +73,11 @@ class Expense:
         date (str): Дата расхода в формате YYYY-MM-DD.
     """
 
-    def __init__(self, id: int, category_id: int, amount: float, description: str, date: str):
-        """Инициализирует объект записи о расходе.
-
-        Args:
-            id (int): Уникальный идентификатор записи.
-            category_id (int): ID категории расхода.
-            amount (float): Сумма расхода.
-            description (str): Описание расхода.
-            date (str): Дата расхода в формате YYYY-MM-DD.
-        """
-        self.id = id
-        self.category_id = category_id
-        self.amount = amount
-        self.description = description
-        self.date = date
+    id: int
+    category_id: int
+    amount: float
+    description: str
+    date: str
 
     def to_dict(self) -> Dict:
         """Преобразует объект расхода в словарь.
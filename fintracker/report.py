@@ -2,19 +2,59 @@
 Модуль для генерации отчетов по расходам из базы данных.
 """
 
-import csv
-import json
-from typing import List, Dict, Optional
-from datetime import datetime
+import functools
+import os
+from typing import Callable, List, Dict, Optional, Tuple
+from datetime import date, datetime
 from .models import Expense, Category
 from .database import Database
 
 
+def _json_dumps_stdlib(data: Dict) -> bytes:
+    """Сериализует данные в JSON (UTF-8) стандартным модулем json."""
+    import json
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _json_dumps_orjson(data: Dict) -> bytes:
+    """Сериализует данные в JSON (UTF-8) с помощью orjson."""
+    import orjson
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+
+@functools.lru_cache(maxsize=1)
+def _json_serializer() -> Callable[[Dict], bytes]:
+    """Выбирает сериализатор JSON: orjson, если установлен, иначе json.
+
+    Наличие orjson проверяется только при первом сохранении отчета в JSON,
+    поэтому остальные команды не тратят время на его импорт.
+
+    Returns:
+        Callable[[Dict], bytes]: Функция сериализации данных в JSON (UTF-8).
+    """
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return _json_dumps_stdlib
+    return _json_dumps_orjson
+
+
+def _json_dumps(data: Dict) -> bytes:
+    """Сериализует данные в JSON (UTF-8) выбранным сериализатором."""
+    return _json_serializer()(data)
+
+
+# Размер буфера файла отчета: CSV записывается на диск крупными блоками
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
 class ReportGenerator:
     """Класс для генерации финансовых отчетов из БД.
 
     Attributes:
         database (Database): Объект базы данных для доступа к данным.
+        _stats_cache (Dict[str, Tuple]): Кэш статистики по периодам
+            вместе с меткой состояния БД, для которой она посчитана.
     """
 
     def __init__(self, storage):
@@ -25,8 +65,10 @@ class ReportGenerator:
         """
         self.storage = storage
         self.database = storage.database
+        self._stats_cache = {}
 
-    def generate_category_report(self, period: str = "month", output_file: Optional[str] = None) -> Dict:
+    def generate_category_report(self, period: str = "month", output_file: Optional[str] = None,
+                                 now: Optional[datetime] = None) -> Dict:
         """Генерирует отчет по расходам по категориям из БД.
 
         Args:
@@ -35,19 +77,22 @@ class ReportGenerator:
                 По умолчанию "month".
             output_file (Optional[str], optional): Путь для сохранения отчета.
                 Если указан, отчет сохраняется в файл.
+            now (Optional[datetime], optional): Время формирования отчета.
+                Позволяет использовать одну метку времени для серии отчетов.
+                По умолчанию текущее время.
 
         Returns:
             Dict: Словарь с данными отчета.
         """
         try:
-            # Используем метод базы данных для получения статистики
-            category_stats = self.database.get_category_stats(period)
+            category_stats, total_expenses = self._get_period_stats(period)
 
-            total_expenses = sum(stat['total_amount'] for stat in category_stats)
+            if now is None:
+                now = datetime.now()
 
             report = {
                 'period': period,
-                'generated_at': datetime.now().isoformat(),
+                'generated_at': now.isoformat(),
                 'total_expenses': total_expenses,
                 'categories': category_stats
             }
@@ -60,6 +105,30 @@ class ReportGenerator:
             print(f"Ошибка при генерации отчета: {e}")
             return {}
 
+    def _get_period_stats(self, period: str) -> Tuple[List[Dict], float]:
+        """Возвращает статистику по категориям и общую сумму за период.
+
+        Результат кэшируется и пересчитывается только при изменении данных
+        в БД или смене текущей даты (периоды отсчитываются от сегодняшнего дня).
+
+        Args:
+            period (str): Период для отчета.
+
+        Returns:
+            Tuple[List[Dict], float]: Статистика по категориям и сумма расходов.
+        """
+        key = (self.database.get_data_version(), date.today())
+        cached = self._stats_cache.get(period)
+
+        if cached is None or cached[0] != key:
+            category_stats, total_expenses = self.database.get_category_stats_with_total(period)
+            cached = (key, category_stats, total_expenses)
+            self._stats_cache[period] = cached
+
+        # Словари категорий копируются, чтобы изменение отчета вызывающим кодом
+        # не затрагивало кэш и следующие отчеты за тот же период
+        return [dict(stat) for stat in cached[1]], cached[2]
+
     def _save_report_to_file(self, report: Dict, output_file: str):
         """Сохраняет отчет в файл в указанном формате.
 
@@ -68,24 +137,34 @@ class ReportGenerator:
             output_file (str): Путь к файлу для сохранения.
         """
         try:
-            if output_file.endswith('.json'):
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(report, f, ensure_ascii=False, indent=2)
-
-            elif output_file.endswith('.csv'):
-                with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            extension = os.path.splitext(output_file)[1].lower()
+
+            if extension == '.json':
+                with open(output_file, 'wb') as f:
+                    # Отчет сериализуется целиком и записывается
+                    # одним вызовом write вместо множества мелких записей
+                    f.write(_json_dumps(report))
+
+            elif extension == '.csv':
+                import csv
+                with open(output_file, 'w', newline='', encoding='utf-8',
+                          buffering=_WRITE_BUFFER_SIZE) as f:
                     writer = csv.writer(f)
                     writer.writerow(['Категория', 'Сумма расходов', 'Количество операций'])
 
-                    for category in report['categories']:
-                        writer.writerow([
+                    # Все строки категорий записываются одним вызовом writerows,
+                    # суммы заранее форматируются с двумя знаками после запятой
+                    writer.writerows([
+                        (
                             category['category_name'],
-                            category['total_amount'],
+                            f"{category['total_amount']:.2f}",
                             category['transaction_count']
-                        ])
+                        )
+                        for category in report['categories']
+                    ])
 
                     writer.writerow([])
-                    writer.writerow(['Итого расходы:', report['total_expenses']])
+                    writer.writerow(['Итого расходы:', f"{report['total_expenses']:.2f}"])
 
             print(f"Отчет сохранен в файл: {output_file}")
 
@@ -2,9 +2,9 @@
 Модуль для работы с хранением данных в SQLite базе данных.
 """
 
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import date
-from .models import Expense, Category
+from .models import Expense, ExpenseWithCategory, Category
 from .database import Database
 
 
@@ -13,6 +13,9 @@ class Storage:
 
     Attributes:
         database (Database): Объект для работы с базой данных.
+        _cat_by_id (Optional[Dict[int, Category]]): Кэш категорий по ID.
+        _categories_by_lname (Optional[Dict[str, Category]]): Кэш категорий,
+            индексированный по названию в нижнем регистре.
     """
 
     def __init__(self, db_path: str = "finance_tracker.db"):
@@ -23,6 +26,8 @@ class Storage:
                 По умолчанию "finance_tracker.db".
         """
         self.database = Database(db_path)
+        self._cat_by_id = None
+        self._categories_by_lname = None
 
     def add_expense(self, category_id: int, amount: float, description: str,
                    expense_date: Optional[str] = None) -> bool:
@@ -40,6 +45,32 @@ class Storage:
         """
         return self.database.add_expense(category_id, amount, description, expense_date)
 
+    def add_expenses(self, rows: Iterable[Tuple[int, float, str, Optional[str]]]) -> int:
+        """Добавляет несколько записей о расходах одной транзакцией.
+
+        Args:
+            rows (Iterable[Tuple[int, float, str, Optional[str]]]): Записи
+                в виде кортежей (category_id, amount, description, expense_date).
+                Если дата равна None, используется текущая дата.
+
+        Returns:
+            int: Количество добавленных записей, 0 в случае ошибки.
+        """
+        return self.database.add_expenses(rows)
+
+    def iter_expenses(self, period: str = "all") -> Iterator[Expense]:
+        """Последовательно выдает расходы за указанный период.
+
+        Args:
+            period (str, optional): Период для фильтрации.
+                Допустимые значения: "day", "week", "month", "year", "all".
+                По умолчанию "all".
+
+        Returns:
+            Iterator[Expense]: Итератор объектов Expense за указанный период.
+        """
+        return self.database.iter_expenses(period)
+
     def get_expenses(self, period: str = "all") -> List[Expense]:
         """Возвращает список расходов за указанный период.
 
@@ -53,6 +84,19 @@ class Storage:
         """
         return self.database.get_expenses(period)
 
+    def iter_expenses_with_category_name(self, period: str = "all") -> Iterator[ExpenseWithCategory]:
+        """Последовательно выдает расходы за период вместе с названиями категорий.
+
+        Args:
+            period (str, optional): Период для фильтрации.
+                Допустимые значения: "day", "week", "month", "year", "all".
+                По умолчанию "all".
+
+        Returns:
+            Iterator[ExpenseWithCategory]: Итератор расходов с названиями категорий.
+        """
+        return self.database.iter_expenses_with_category_name(period)
+
     def get_categories(self) -> List[Category]:
         """Возвращает список всех категорий.
 
@@ -70,4 +114,51 @@ class Storage:
         Returns:
             bool: True если запись удалена, False если запись не найдена.
         """
-        return self.database.delete_expense(expense_id)
\ No newline at end of file
+        return self.database.delete_expense(expense_id)
+
+    def close(self):
+        """Закрывает соединение с базой данных."""
+        self.database.close()
+
+    def categories_by_id(self) -> Dict[int, Category]:
+        """Возвращает кэшированный словарь категорий по ID.
+
+        Словарь строится один раз при первом обращении и сбрасывается
+        методом invalidate_categories().
+
+        Returns:
+            Dict[int, Category]: Словарь {ID: Category}.
+        """
+        if self._cat_by_id is None:
+            self._cat_by_id = {cat.id: cat for cat in self.database.get_categories()}
+        return self._cat_by_id
+
+    def categories_by_lname(self) -> Dict[str, Category]:
+        """Возвращает кэшированный словарь категорий по названию.
+
+        Строится на основе categories_by_id() без повторного запроса к БД.
+
+        Returns:
+            Dict[str, Category]: Словарь {название в нижнем регистре: Category}.
+        """
+        if self._categories_by_lname is None:
+            self._categories_by_lname = {
+                cat.name.lower(): cat for cat in self.categories_by_id().values()
+            }
+        return self._categories_by_lname
+
+    def get_category_by_name(self, name: str) -> Optional[Category]:
+        """Ищет категорию по названию без учета регистра.
+
+        Args:
+            name (str): Название категории.
+
+        Returns:
+            Optional[Category]: Найденная категория или None.
+        """
+        return self.categories_by_lname().get(name.lower())
+
+    def invalidate_categories(self):
+        """Сбрасывает кэш категорий после изменения их списка."""
+        self._cat_by_id = None
+        self._categories_by_lname = None
@@ -5,14 +5,18 @@
 """
 
 import argparse
+import functools
 import sys
-from fintracker.command import CommandHandler
 
 
-def main():
-    """Основная функция для запуска финансового трекера.
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки.
 
-    Обрабатывает аргументы командной строки и выполняет соответствующие команды.
+    Парсер строится один раз и переиспользуется при повторных вызовах main().
+
+    Returns:
+        argparse.ArgumentParser: Парсер с подкомандами трекера.
     """
     parser = argparse.ArgumentParser(description='Финансовый трекер расходов')
     subparsers = parser.add_subparsers(dest='command', help='Доступные команды')
@@ -41,12 +45,24 @@ def main():
     delete_parser = subparsers.add_parser('delete', help='Удалить расход по ID')
     delete_parser.add_argument('--id', '-i', type=int, required=True, help='ID расхода для удаления')
 
+    return parser
+
+
+def main():
+    """Основная функция для запуска финансового трекера.
+
+    Обрабатывает аргументы командной строки и выполняет соответствующие команды.
+    """
+    parser = _build_parser()
     args = parser.parse_args()
 
     if not args.command:
         parser.print_help()
         return
 
+    # Обработчик (и вместе с ним БД и генератор отчетов) импортируется
+    # только когда действительно нужно выполнить команду
+    from fintracker.command import CommandHandler
     handler = CommandHandler()
 
     try:
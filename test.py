@@ -1,65 +1,78 @@
 """
 Полные тесты для финансового трекера с БД.
+
+Тесты используют методы assert* из unittest, поэтому переписывание
+assert в pytest для этого модуля отключено: PYTEST_DONT_REWRITE
 """
 
 import unittest
+import io
 import os
 import json
 import csv
 import tempfile
-import sqlite3
+from contextlib import closing, redirect_stdout
+from dataclasses import FrozenInstanceError
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
 from fintracker.models import Category, Expense
-from fintracker.database import Database
-from fintracker.storage import Storage
-from fintracker.report import ReportGenerator
-from fintracker.command import CommandHandler
 
+# Модули, работающие с SQLite, импортируются внутри тестовых классов,
+# которым они нужны: выборочный запуск тестов моделей их не загружает
 
-class TestCategory(unittest.TestCase):
-    """Тесты для класса Category."""
 
-    def test_category_creation(self):
-        """Тест создания категории с корректными параметрами."""
-        category = Category(1, "Еда")
-        self.assertEqual(category.id, 1)
-        self.assertEqual(category.name, "Еда")
+# Названия категорий, которыми заполняется новая база данных
+INITIAL_CATEGORY_NAMES = frozenset(
+    ("Еда", "Транспорт", "Развлечения", "Коммунальные", "Одежда", "Здоровье")
+)
 
-    def test_to_dict(self):
-        """Тест преобразования категории в словарь."""
-        category = Category(1, "Транспорт")
-        expected_dict = {'id': 1, 'name': 'Транспорт'}
-        self.assertEqual(category.to_dict(), expected_dict)
 
-    def test_from_dict(self):
-        """Тест создания категории из словаря."""
-        data = {'id': 2, 'name': 'Развлечения'}
-        category = Category.from_dict(data)
-        self.assertEqual(category.id, 2)
-        self.assertEqual(category.name, 'Развлечения')
+def _clear_expenses(database):
+    """Удаляет все расходы и сбрасывает счетчик ID, не пересоздавая БД.
+
+    Args:
+        database (Database): База данных, общая для тестов класса.
+    """
+    with database._connect() as conn:
+        conn.execute("DELETE FROM expenses")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'expenses'")
+
+
+class TestCategory(unittest.TestCase):
+    """Тесты для класса Category."""
+
+    def test_category_roundtrip(self):
+        """Тест создания категории и преобразования в словарь и обратно."""
+        cases = [
+            ((1, "Еда"), {'id': 1, 'name': 'Еда'}),
+            ((1, "Транспорт"), {'id': 1, 'name': 'Транспорт'}),
+            ((2, "Развлечения"), {'id': 2, 'name': 'Развлечения'}),
+        ]
+        for args, expected_dict in cases:
+            with self.subTest(case=expected_dict['name']):
+                category = Category(*args)
+                self.assertEqual((category.id, category.name), args)
+                self.assertEqual(category.to_dict(), expected_dict)
+                self.assertEqual(Category.from_dict(expected_dict), category)
+
+    def test_category_slots(self):
+        """Тест отсутствия __dict__ у экземпляров категории."""
+        self.assertFalse(hasattr(Category(1, "Еда"), '__dict__'))
 
     def test_from_dict_invalid_data(self):
         """Тест создания категории из некорректных данных."""
-        with self.assertRaises(KeyError):
-            Category.from_dict({'name': 'Без ID'})
-        with self.assertRaises(KeyError):
-            Category.from_dict({'id': 1})
+        for data in ({'name': 'Без ID'}, {'id': 1}):
+            with self.subTest(data=data):
+                with self.assertRaises(KeyError):
+                    Category.from_dict(data)
 
 
 class TestExpense(unittest.TestCase):
     """Тесты для класса Expense."""
 
-    def test_expense_creation(self):
-        """Тест создания расхода с корректными параметрами."""
-        expense = Expense(1, 2, 100.50, "Обед", "2024-01-15")
-        self.assertEqual(expense.id, 1)
-        self.assertEqual(expense.category_id, 2)
-        self.assertEqual(expense.amount, 100.50)
-        self.assertEqual(expense.description, "Обед")
-        self.assertEqual(expense.date, "2024-01-15")
-
-    def test_to_dict(self):
-        """Тест преобразования расхода в словарь."""
-        expense = Expense(1, 2, 100.50, "Обед", "2024-01-15")
+    def test_expense_roundtrip(self):
+        """Тест создания расхода и преобразования в словарь и обратно."""
         expected_dict = {
             'id': 1,
             'category_id': 2,
@@ -67,20 +80,24 @@ class TestExpense(unittest.TestCase):
             'description': 'Обед',
             'date': '2024-01-15'
         }
+        expense = Expense(1, 2, 100.50, "Обед", "2024-01-15")
+
+        for field, value in expected_dict.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(expense, field), value)
         self.assertEqual(expense.to_dict(), expected_dict)
+        self.assertEqual(Expense.from_dict(expected_dict), expense)
 
-    def test_from_dict(self):
-        """Тест создания расхода из словаря."""
-        data = {
-            'id': 1,
-            'category_id': 2,
-            'amount': 100.50,
-            'description': 'Обед',
-            'date': '2024-01-15'
-        }
-        expense = Expense.from_dict(data)
-        self.assertEqual(expense.id, 1)
-        self.assertEqual(expense.amount, 100.50)
+    def test_expense_slots(self):
+        """Тест отсутствия __dict__ у экземпляров расхода."""
+        self.assertFalse(hasattr(Expense(1, 2, 100.50, "Обед", "2024-01-15"), '__dict__'))
+
+    def test_expense_equality_and_immutability(self):
+        """Тест сравнения расходов и запрета их изменения."""
+        expense = Expense(1, 2, 100.50, "Обед", "2024-01-15")
+        self.assertEqual(expense, Expense(1, 2, 100.50, "Обед", "2024-01-15"))
+        with self.assertRaises(FrozenInstanceError):
+            expense.amount = 200.0
 
     def test_from_dict_missing_fields(self):
         """Тест создания расхода из словаря с отсутствующими полями."""
@@ -88,42 +105,101 @@ class TestExpense(unittest.TestCase):
             Expense.from_dict({'id': 1, 'amount': 100})
 
 
-class TestDatabase(unittest.TestCase):
-    """Тесты для класса Database."""
+class TestDatabaseFile(unittest.TestCase):
+    """Тесты базы данных, которым нужен файл на диске."""
 
-    def setUp(self):
-        """Создаем тестовую базу данных."""
-        self.test_db = "test_finance.db"
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
-        self.db = Database(self.test_db)
+    @classmethod
+    def setUpClass(cls):
+        """Создаем файловую тестовую базу данных во временном каталоге.
 
-    def tearDown(self):
-        """Удаляем тестовую базу данных."""
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
+        Собственный каталог не пересекается с другими процессами,
+        поэтому тесты можно запускать параллельно.
+        """
+        from fintracker.database import Database
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.test_db = os.path.join(cls.tmp_dir.name, "test_finance.db")
+        cls.db = Database(cls.test_db)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Удаляем тестовую базу данных вместе с временным каталогом."""
+        cls.db.close()
+        cls.tmp_dir.cleanup()
+
+    def setUp(self):
+        """Очищаем расходы, оставленные предыдущим тестом."""
+        _clear_expenses(self.db)
 
     def test_database_creation(self):
         """Тест создания базы данных и таблиц."""
+        import sqlite3
+
         self.assertTrue(os.path.exists(self.test_db))
 
-        with sqlite3.connect(self.test_db) as conn:
+        with closing(sqlite3.connect(self.test_db)) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
             tables = [row[0] for row in cursor.fetchall()]
             self.assertIn('categories', tables)
             self.assertIn('expenses', tables)
 
+    def test_reopen_initialized_database(self):
+        """Тест повторного открытия уже инициализированной базы данных."""
+        import sqlite3
+        from fintracker.database import Database, SCHEMA_VERSION
+
+        self.db.add_expense(1, 100.0, "Продукты")
+
+        reopened = Database(self.test_db)
+        self.addCleanup(reopened.close)
+        with closing(sqlite3.connect(self.test_db)) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, SCHEMA_VERSION)
+        self.assertEqual(len(reopened.get_categories()), 6)
+        self.assertEqual(len(reopened.get_expenses()), 1)
+
+    def test_journal_settings(self):
+        """Тест режима журнала WAL и synchronous=NORMAL для файловой базы."""
+        with self.db._connect() as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(synchronous, 1)
+
+    def test_storage_initialization(self):
+        """Тест инициализации хранилища."""
+        from fintracker.storage import Storage
+
+        storage = Storage(self.test_db)
+        self.addCleanup(storage.close)
+        self.assertEqual(storage.database.db_path, self.test_db)
+        self.assertTrue(os.path.exists(self.test_db))
+
+
+class TestDatabase(unittest.TestCase):
+    """Тесты для класса Database."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Создаем тестовую базу данных в памяти один раз для всех тестов класса."""
+        from fintracker.database import Database
+        cls.db = Database(":memory:")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Закрываем тестовую базу данных."""
+        cls.db.close()
+
+    def setUp(self):
+        """Очищаем расходы, оставленные предыдущим тестом."""
+        _clear_expenses(self.db)
+
     def test_initial_categories(self):
         """Тест начальных категорий."""
         categories = self.db.get_categories()
         self.assertEqual(len(categories), 6)
 
-        expected_names = ["Еда", "Транспорт", "Развлечения", "Коммунальные", "Одежда", "Здоровье"]
-        actual_names = [cat.name for cat in categories]
-
-        for expected_name in expected_names:
-            self.assertIn(expected_name, actual_names)
+        self.assertGreaterEqual({cat.name for cat in categories}, INITIAL_CATEGORY_NAMES)
 
     def test_add_expense_success(self):
         """Тест успешного добавления расхода."""
@@ -142,10 +218,29 @@ class TestDatabase(unittest.TestCase):
         expenses = self.db.get_expenses()
         self.assertEqual(expenses[0].date, "2024-01-15")
 
+    def test_add_expenses_batch(self):
+        """Тест пакетного добавления расходов одной транзакцией."""
+        added = self.db.add_expenses([
+            (1, 100.0, "Продукты", None),
+            (2, 200.0, "Такси", "2024-01-15"),
+        ])
+        self.assertEqual(added, 2)
+        self.assertEqual(len(self.db.get_expenses()), 2)
+
+        # Ошибка в одной записи откатывает весь пакет
+        added = self.db.add_expenses([
+            (1, 50.0, "Кофе", None),
+            (1, 50.0, None, None),
+        ])
+        self.assertEqual(added, 0)
+        self.assertEqual(len(self.db.get_expenses()), 2)
+
     def test_get_expenses_periods(self):
         """Тест получения расходов за разные периоды."""
-        self.db.add_expense(1, 100.0, "Расход 1")
-        self.db.add_expense(2, 200.0, "Расход 2")
+        self.db.add_expenses([
+            (1, 100.0, "Расход 1", None),
+            (2, 200.0, "Расход 2", None),
+        ])
 
         all_expenses = self.db.get_expenses("all")
         self.assertEqual(len(all_expenses), 2)
@@ -153,6 +248,27 @@ class TestDatabase(unittest.TestCase):
         month_expenses = self.db.get_expenses("month")
         self.assertEqual(len(month_expenses), 2)
 
+    def test_get_expenses_day_and_week(self):
+        """Тест получения расходов за день и неделю."""
+        self.db.add_expense(1, 100.0, "Сегодня")
+        self.db.add_expense(2, 200.0, "Давно", "2000-01-01")
+
+        day_expenses = self.db.get_expenses("day")
+        self.assertEqual([e.description for e in day_expenses], ["Сегодня"])
+
+        week_expenses = self.db.get_expenses("week")
+        self.assertEqual([e.description for e in week_expenses], ["Сегодня"])
+
+    def test_get_expenses_with_category_name(self):
+        """Тест получения расходов вместе с названиями категорий."""
+        self.db.add_expense(2, 200.0, "Такси", "2024-01-15")
+        self.db.add_expense(1, 100.0, "Продукты", "2024-01-16")
+
+        expenses = list(self.db.iter_expenses_with_category_name("all"))
+        self.assertEqual([e.category_name for e in expenses], ["Еда", "Транспорт"])
+        self.assertEqual(expenses[0].description, "Продукты")
+        self.assertEqual(expenses[0].amount, 100.0)
+
     def test_delete_existing_expense(self):
         """Тест удаления существующего расхода."""
         self.db.add_expense(1, 100.0, "Для удаления")
@@ -171,37 +287,65 @@ class TestDatabase(unittest.TestCase):
 
     def test_get_category_stats(self):
         """Тест получения статистики по категориям."""
-        self.db.add_expense(1, 100.0, "Еда 1")
-        self.db.add_expense(1, 200.0, "Еда 2")
-        self.db.add_expense(2, 150.0, "Транспорт")
+        self.db.add_expenses([
+            (1, 100.0, "Еда 1", None),
+            (1, 200.0, "Еда 2", None),
+            (2, 150.0, "Транспорт", None),
+        ])
 
         stats = self.db.get_category_stats("all")
         self.assertEqual(len(stats), 2)
 
-        food_stats = next(stat for stat in stats if stat['category_name'] == 'Еда')
-        self.assertEqual(food_stats['total_amount'], 300.0)
-        self.assertEqual(food_stats['transaction_count'], 2)
+        stats_by_name = {stat['category_name']: stat for stat in stats}
+        self.assertEqual(stats_by_name['Еда']['total_amount'], 300.0)
+        self.assertEqual(stats_by_name['Еда']['transaction_count'], 2)
+        self.assertEqual(stats_by_name['Транспорт']['total_amount'], 150.0)
+
+    def test_get_category_stats_period(self):
+        """Тест статистики по категориям с фильтрацией по периоду."""
+        self.db.add_expenses([
+            (1, 100.0, "Еда", None),
+            (1, 40.0, "Старая еда", "2000-01-01"),
+            (2, 150.0, "Старый транспорт", "2000-01-01"),
+        ])
+
+        stats = self.db.get_category_stats("month")
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['category_name'], 'Еда')
+        self.assertEqual(stats[0]['total_amount'], 100.0)
+        self.assertEqual(stats[0]['transaction_count'], 1)
+
+    def test_get_category_stats_with_total(self):
+        """Тест получения статистики по категориям вместе с общей суммой."""
+        stats, total = self.db.get_category_stats_with_total("all")
+        self.assertEqual(stats, [])
+        self.assertEqual(total, 0)
+
+        self.db.add_expense(1, 100.0, "Еда")
+        self.db.add_expense(2, 150.0, "Транспорт")
+
+        stats, total = self.db.get_category_stats_with_total("all")
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(total, 250.0)
 
 
 class TestStorage(unittest.TestCase):
     """Тесты для класса Storage."""
 
-    def setUp(self):
-        """Создаем тестовое хранилище."""
-        self.test_db = "test_storage.db"
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
-        self.storage = Storage(self.test_db)
+    @classmethod
+    def setUpClass(cls):
+        """Создаем тестовое хранилище в памяти один раз для всех тестов класса."""
+        from fintracker.storage import Storage
+        cls.storage = Storage(":memory:")
 
-    def tearDown(self):
-        """Удаляем тестовую базу данных."""
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
+    @classmethod
+    def tearDownClass(cls):
+        """Закрываем тестовое хранилище."""
+        cls.storage.close()
 
-    def test_storage_initialization(self):
-        """Тест инициализации хранилища."""
-        self.assertEqual(self.storage.database.db_path, self.test_db)
-        self.assertTrue(os.path.exists(self.test_db))
+    def setUp(self):
+        """Очищаем расходы, оставленные предыдущим тестом."""
+        _clear_expenses(self.storage.database)
 
     def test_add_expense(self):
         """Тест добавления расхода через хранилище."""
@@ -216,7 +360,33 @@ class TestStorage(unittest.TestCase):
         """Тест получения категорий через хранилище."""
         categories = self.storage.get_categories()
         self.assertEqual(len(categories), 6)
-        self.assertIn("Еда", [cat.name for cat in categories])
+        self.assertGreaterEqual({cat.name for cat in categories}, INITIAL_CATEGORY_NAMES)
+
+    def test_iter_expenses(self):
+        """Тест потокового получения расходов через итератор."""
+        self.storage.add_expense(1, 100.0, "Завтрак", "2024-01-15")
+        self.storage.add_expense(2, 200.0, "Такси", "2024-01-16")
+
+        expenses = self.storage.iter_expenses("all")
+        self.assertEqual(next(expenses).description, "Такси")
+        self.assertEqual(next(expenses).description, "Завтрак")
+        self.assertIsNone(next(expenses, None))
+
+    def test_get_category_by_name(self):
+        """Тест поиска категории по названию без учета регистра."""
+        category = self.storage.get_category_by_name("еДА")
+        self.assertIsNotNone(category)
+        self.assertEqual(category.id, 1)
+        self.assertIsNone(self.storage.get_category_by_name("Несуществующая"))
+
+    def test_categories_by_id_cached(self):
+        """Тест кэширования словаря категорий по ID."""
+        categories = self.storage.categories_by_id()
+        self.assertEqual(categories[2].name, "Транспорт")
+        self.assertIs(self.storage.categories_by_id(), categories)
+
+        self.storage.invalidate_categories()
+        self.assertIsNot(self.storage.categories_by_id(), categories)
 
     def test_get_expenses_different_periods(self):
         """Тест получения расходов за разные периоды."""
@@ -245,20 +415,126 @@ class TestStorage(unittest.TestCase):
 
 
 class TestReportGenerator(unittest.TestCase):
-    """Тесты для класса ReportGenerator."""
+    """Тесты для класса ReportGenerator на общем наборе данных.
+
+    Данные добавляются один раз для всего класса, поэтому тесты
+    здесь только читают их и не изменяют базу.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Создаем хранилище с данными и генерируем отчет один раз для всех тестов класса."""
+        from fintracker.storage import Storage
+        from fintracker.report import ReportGenerator
+        cls.storage = Storage(":memory:")
+        cls.storage.add_expenses([
+            (1, 100.0, "Продукты", None),
+            (1, 200.0, "Ресторан", None),
+            (2, 150.5, "Метро", None),
+        ])
+        cls.reporter = ReportGenerator(cls.storage)
+        cls.report = cls.reporter.generate_category_report("all")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Закрываем тестовое хранилище."""
+        cls.storage.close()
+
+    def test_report_with_data(self):
+        """Тест генерации отчета с данными."""
+        self.assertEqual(self.report['period'], 'all')
+        self.assertEqual(self.report['total_expenses'], 450.5)
+        self.assertEqual(len(self.report['categories']), 2)
+
+        # Используем правильные ключи из get_category_stats
+        categories = {c['category_name']: c for c in self.report['categories']}
+        self.assertEqual(categories['Еда']['total_amount'], 300.0)  # Исправлено на total_amount
+        self.assertEqual(categories['Еда']['transaction_count'], 2)
+        self.assertEqual(categories['Транспорт']['total_amount'], 150.5)
+
+    def test_report_generated_at(self):
+        """Тест передачи времени формирования отчета."""
+        now = datetime(2024, 1, 15, 12, 30)
+        first = self.reporter.generate_category_report("all", now=now)
+        second = self.reporter.generate_category_report("month", now=now)
+
+        self.assertEqual(first['generated_at'], '2024-01-15T12:30:00')
+        self.assertEqual(second['generated_at'], first['generated_at'])
+
+    def test_print_report(self):
+        """Тест вывода отчета в консоль."""
+        self.reporter.print_report(self.report)
+
+    def test_save_report_json(self):
+        """Тест сохранения отчета в JSON файл."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "report.json")
+            report = self.reporter.generate_category_report("all", output_file)
+
+            with open(output_file, encoding='utf-8') as f:
+                saved = json.load(f)
+
+        self.assertEqual(saved, report)
+
+    def test_save_report_json_stdlib(self):
+        """Тест сохранения отчета в JSON без orjson."""
+        from fintracker.report import _json_dumps_stdlib
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "report.json")
+            with patch('fintracker.report._json_dumps', _json_dumps_stdlib):
+                report = self.reporter.generate_category_report("all", output_file)
+
+            with open(output_file, encoding='utf-8') as f:
+                saved = json.load(f)
+
+        self.assertEqual(saved, report)
+
+    def test_save_report_csv(self):
+        """Тест сохранения отчета в CSV файл."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "report.csv")
+            self.reporter.generate_category_report("all", output_file)
+
+            with open(output_file, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+
+        self.assertEqual(rows[0], ['Категория', 'Сумма расходов', 'Количество операций'])
+        self.assertEqual(rows[1], ['Еда', '300.00', '2'])
+        self.assertEqual(rows[2], ['Транспорт', '150.50', '1'])
+        self.assertEqual(rows[-1], ['Итого расходы:', '450.50'])
+
+
+class TestReportGeneratorUpdates(unittest.TestCase):
+    """Тесты ReportGenerator, которым нужна пустая или изменяемая база."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Создаем хранилище и генератор отчетов один раз для всех тестов класса."""
+        from fintracker.storage import Storage
+        from fintracker.report import ReportGenerator
+        cls.storage = Storage(":memory:")
+        cls.reporter = ReportGenerator(cls.storage)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Закрываем тестовое хранилище."""
+        cls.storage.close()
 
     def setUp(self):
-        """Создаем тестовое хранилище и генератор отчетов."""
-        self.test_db = "test_report.db"
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
-        self.storage = Storage(self.test_db)
-        self.reporter = ReportGenerator(self.storage)
-
-    def tearDown(self):
-        """Удаляем тестовую базу данных."""
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
+        """Очищаем расходы, оставленные предыдущим тестом."""
+        _clear_expenses(self.storage.database)
+
+    def test_report_mutation_does_not_affect_cache(self):
+        """Тест независимости следующего отчета от изменений предыдущего."""
+        self.storage.add_expense(1, 100.0, "Продукты")
+        first = self.reporter.generate_category_report("all")
+        first['categories'][0]['total_amount'] = 999
+        first['categories'].clear()
+
+        second = self.reporter.generate_category_report("all")
+        self.assertEqual(len(second['categories']), 1)
+        self.assertEqual(second['categories'][0]['total_amount'], 100.0)
 
     def test_empty_report(self):
         """Тест генерации отчета без данных."""
@@ -268,132 +544,136 @@ class TestReportGenerator(unittest.TestCase):
         self.assertEqual(report['total_expenses'], 0)
         self.assertEqual(len(report['categories']), 0)
 
-    def test_report_with_data(self):
-        """Тест генерации отчета с данными."""
+    def test_report_cache_invalidated_on_write(self):
+        """Тест пересчета кэшированного отчета после изменения данных."""
         self.storage.add_expense(1, 100.0, "Продукты")
-        self.storage.add_expense(1, 200.0, "Ресторан")
-        self.storage.add_expense(2, 150.0, "Метро")
+        first = self.reporter.generate_category_report("all")
+        self.assertEqual(first['total_expenses'], 100.0)
 
-        report = self.reporter.generate_category_report("all")
-
-        self.assertEqual(report['total_expenses'], 450.0)
-        self.assertEqual(len(report['categories']), 2)
-
-        # Используем правильные ключи из get_category_stats
-        food_cat = next(c for c in report['categories'] if c['category_name'] == 'Еда')
-        self.assertEqual(food_cat['total_amount'], 300.0)  # Исправлено на total_amount
-        self.assertEqual(food_cat['transaction_count'], 2)
-
-
-    def test_print_report(self):
-        """Тест вывода отчета в консоль."""
-        self.storage.add_expense(1, 100.0, "Тест")
-        report = self.reporter.generate_category_report("all")
-
-        # Проверяем, что функция не падает с ошибкой
-        try:
-            self.reporter.print_report(report)
-        except Exception as e:
-            self.fail(f"print_report() вызвал исключение: {e}")
+        self.storage.add_expense(2, 50.0, "Метро")
+        second = self.reporter.generate_category_report("all")
+        self.assertEqual(second['total_expenses'], 150.0)
+        self.assertEqual(len(second['categories']), 2)
 
 
 class TestCommandHandler(unittest.TestCase):
     """Тесты для класса CommandHandler."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Создаем тестовый обработчик команд один раз для всех тестов класса."""
+        from fintracker.storage import Storage
+        from fintracker.command import CommandHandler
+        cls.handler = CommandHandler(Storage(":memory:"))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Закрываем тестовое хранилище."""
+        cls.handler.storage.close()
+
     def setUp(self):
-        """Создаем тестовый обработчик команд."""
-        self.test_db = "test_commands.db"
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
-        self.handler = CommandHandler()
-        # Подменяем базу данных на тестовую
-        self.handler.storage = Storage(self.test_db)
-        self.handler.report_generator = ReportGenerator(self.handler.storage)
+        """Очищаем расходы, оставленные предыдущим тестом."""
+        _clear_expenses(self.handler.storage.database)
 
-    def tearDown(self):
-        """Удаляем тестовую базу данных."""
-        if os.path.exists(self.test_db):
-            os.unlink(self.test_db)
+    def _delete_category(self, category_id):
+        """Удаляет категорию, добавленную тестом.
 
+        Args:
+            category_id (int): ID удаляемой категории.
+        """
+        with self.handler.storage.database._connect() as conn:
+            conn.execute("DELETE FROM categories WHERE id = ?", (category_id,))
 
     def test_handle_add_valid(self):
-        """Тест обработки команды add с валидными данными."""
-        class MockArgs:
-            category = "Еда"
-            amount = 100.0
-            description = "Тестовый расход"
-
-        args = MockArgs()
+        """Тест обработки команды add с начальной категорией в любом регистре."""
+        storage = self.handler.storage
+        args = SimpleNamespace(category="еДА", amount=100.0, description="Тестовый расход")
 
-        # Проверяем, что функция не падает с ошибкой
-        try:
+        # Начальная категория находится без обращения к категориям из БД
+        with patch.object(storage, 'get_category_by_name') as lookup:
             self.handler.handle_add(args)
-        except Exception as e:
-            self.fail(f"handle_add() вызвал исключение: {e}")
+        lookup.assert_not_called()
+
+        expenses = storage.get_expenses()
+        self.assertEqual(len(expenses), 1)
+        self.assertEqual(expenses[0].category_id, 1)
+        self.assertEqual(expenses[0].amount, 100.0)
+        self.assertEqual(expenses[0].description, "Тестовый расход")
+
+    def test_handle_add_user_category(self):
+        """Тест обработки команды add с категорией, добавленной в БД."""
+        storage = self.handler.storage
+        with storage.database._connect() as conn:
+            conn.execute("INSERT INTO categories (id, name) VALUES (7, 'Подарки')")
+        storage.invalidate_categories()
+        self.addCleanup(storage.invalidate_categories)
+        self.addCleanup(self._delete_category, 7)
+
+        args = SimpleNamespace(category="ПОДАРКИ", amount=500.0, description="Цветы")
+        self.handler.handle_add(args)
+
+        expenses = storage.get_expenses()
+        self.assertEqual(len(expenses), 1)
+        self.assertEqual(expenses[0].category_id, 7)
 
     def test_handle_add_invalid_category(self):
         """Тест обработки команды add с невалидной категорией."""
-        class MockArgs:
-            category = "НесуществующаяКатегория"
-            amount = 100.0
-            description = "Тестовый расход"
-
-        args = MockArgs()
-
-        # Проверяем, что функция не падает с ошибкой
-        try:
+        args = SimpleNamespace(
+            category="НесуществующаяКатегория",
+            amount=100.0,
+            description="Тестовый расход",
+        )
+
+        output = io.StringIO()
+        with redirect_stdout(output):
             self.handler.handle_add(args)
-        except Exception as e:
-            self.fail(f"handle_add() вызвал исключение: {e}")
+
+        self.assertIn("Категория 'НесуществующаяКатегория' не найдена!", output.getvalue())
+        self.assertEqual(self.handler.storage.get_expenses(), [])
 
     def test_handle_list(self):
         """Тест обработки команды list."""
-        class MockArgs:
-            period = "all"
+        self.handler.storage.add_expense(1, 100.0, "Тест", "2024-01-15")
 
-        args = MockArgs()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.handler.handle_list(SimpleNamespace(period="all"))
+        lines = output.getvalue().splitlines()
 
-        # Сначала добавляем тестовые данные
-        self.handler.storage.add_expense(1, 100.0, "Тест")
+        self.assertIn("=== РАСХОДЫ (ALL) ===", lines)
+        self.assertIn("2024-01-15 | Еда             |   100.00 ₽ | Тест", lines)
+        self.assertEqual(lines[-1], "Итого расходы: 100.00 ₽")
+
+    def test_handle_list_empty_period(self):
+        """Тест обработки команды list без расходов за период."""
+        self.handler.storage.add_expense(1, 100.0, "Давно", "2000-01-01")
 
-        # Проверяем, что функция не падает с ошибкой
-        try:
-            self.handler.handle_list(args)
-        except Exception as e:
-            self.fail(f"handle_list() вызвал исключение: {e}")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.handler.handle_list(SimpleNamespace(period="day"))
+
+        self.assertEqual(
+            output.getvalue(),
+            "Расходы за указанный период (day) не найдены\n"
+        )
 
     def test_handle_report(self):
         """Тест обработки команды report."""
-        class MockArgs:
-            period = "all"
-            output = None
-
-        args = MockArgs()
+        args = SimpleNamespace(period="all", output=None)
 
         # Сначала добавляем тестовые данные
         self.handler.storage.add_expense(1, 100.0, "Тест")
 
-        # Проверяем, что функция не падает с ошибкой
-        try:
-            self.handler.handle_report(args)
-        except Exception as e:
-            self.fail(f"handle_report() вызвал исключение: {e}")
+        self.handler.handle_report(args)
 
     def test_handle_delete(self):
         """Тест обработки команды delete."""
-        class MockArgs:
-            id = 1
-
-        args = MockArgs()
+        args = SimpleNamespace(id=1)
 
         # Сначала добавляем тестовые данные
         self.handler.storage.add_expense(1, 100.0, "Для удаления")
 
-        # Проверяем, что функция не падает с ошибкой
-        try:
-            self.handler.handle_delete(args)
-        except Exception as e:
-            self.fail(f"handle_delete() вызвал исключение: {e}")
+        self.handler.handle_delete(args)
 
 
 